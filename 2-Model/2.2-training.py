@@ -1,12 +1,23 @@
 """
 Offline SAC Training with Ray RLlib
 ===================================
+"""
 
+import copy
 import os
-import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 import numpy as np
+import scipy.signal
+import pyarrow as pa
+import pyarrow.csv as pac
 import gymnasium as gym
+import tree
 from ray.rllib.algorithms.sac import SACConfig
+from ray.rllib.connectors.learner import NumpyToTensor
+from ray.rllib.env.single_agent_episode import SingleAgentEpisode
+from ray.rllib.execution.segment_tree import MinSegmentTree, SumSegmentTree
+from ray.rllib.utils.replay_buffers import PrioritizedEpisodeReplayBuffer
 import torch
 import warnings
 from ray.rllib.policy.sample_batch import SampleBatch
@@ -16,16 +27,89 @@ warnings.filterwarnings("ignore")
 # =========================
 # 1. Load Offline Dataset
 # =========================
+DATASET_CSV = "model-base.csv"
+DATASET_CACHE = "model-base.npy"  # float32 copy of the CSV, memory-mapped on reuse
+NUM_COLUMNS = 37                  # 34 states + action + reward + terminal
+
+def count_rows(csv_path):
+    """Count the non-empty data rows of a CSV file (header excluded)."""
+    with open(csv_path, "rb") as f:
+        return sum(1 for line in f if line.strip()) - 1
+
+def load_dataset(csv_path=DATASET_CSV, cache_path=DATASET_CACHE):
+    """
+    Load the offline dataset as one (N, 37) float32 block.
+
+    The CSV is streamed batch by batch through pyarrow, parsed directly into
+    float32 columns and written into a preallocated memory-mapped .npy cache,
+    so neither a float64 intermediate nor a full in-memory table is built.
+    Later runs memory-map the cache instead of re-parsing the CSV.
+    """
+    # The cache is reused unless the CSV exists and is newer than it
+    if os.path.exists(cache_path) and (
+            not os.path.exists(csv_path)
+            or os.path.getmtime(cache_path) >= os.path.getmtime(csv_path)):
+        return np.load(cache_path, mmap_mode="r")
+
+    # Autogenerated names (f0, f1, ...) so the schema does not depend on the header
+    columns = [f"f{i}" for i in range(NUM_COLUMNS)]
+    reader = pac.open_csv(
+        csv_path,
+        read_options=pac.ReadOptions(skip_rows=1, autogenerate_column_names=True),
+        convert_options=pac.ConvertOptions(
+            column_types={c: pa.float32() for c in columns},
+            include_columns=columns,
+        ),
+    )
+
+    # Write to a temporary file first so an interrupted run leaves no partial cache
+    n = count_rows(csv_path)
+    tmp_path = cache_path + ".tmp"
+    try:
+        combined = np.lib.format.open_memmap(
+            tmp_path, mode="w+", dtype=np.float32, shape=(n, NUM_COLUMNS))
+        offset = 0
+        for batch in reader:
+            k = batch.num_rows
+            for i in range(NUM_COLUMNS):
+                # Empty cells are nulls; the copy turns them into NaN
+                combined[offset:offset + k, i] = batch.column(i).to_numpy(zero_copy_only=False)
+            offset += k
+        if offset != n:
+            raise ValueError(f"Expected {n} rows in {csv_path}, parsed {offset}")
+        combined.flush()
+        del combined
+        os.replace(tmp_path, cache_path)
+    except BaseException:
+        combined = None  # close the memmap before removing its file
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return np.load(cache_path, mmap_mode="r")
+
 print("▌Loading data...")
-data = pd.read_csv("model-base.csv")
-states = data.iloc[:, 0:34].values.astype(np.float32)
-actions = data.iloc[:, 34:35].values.astype(np.float32)
-rewards = data.iloc[:, 35:36].values.astype(np.float32)
-terminals = data.iloc[:, 36:37].values.astype(np.float32)
+data = load_dataset()
+states = data[:, 0:34]
+actions = data[:, 34:35]
+rewards = data[:, 35:36]
+is_terminal = data[:, 36] != 0
 
 # Set terminal flags for last 1000 samples if no terminals exist
-if terminals.sum() == 0:
-    terminals[-1000:, 0] = 1  # Default terminal state handling
+if not is_terminal.any():
+    is_terminal[-1000:] = True  # Default terminal state handling
+
+# Terminal flags are kept bit-packed (1 bit per sample, little bit order)
+term_bits = np.packbits(is_terminal, bitorder="little")
+del is_terminal
+
+def terminal_flags(lo, hi):
+    """Unpack the terminal flags of samples lo..hi-1 into a bool array."""
+    bits = np.unpackbits(term_bits[lo >> 3:(hi + 7) >> 3], bitorder="little")
+    return bits[(lo & 7):(lo & 7) + (hi - lo)].astype(bool)
+
+# States (0-33), action (34) and reward (35) share one contiguous float32 row;
+# built once and shared by every OfflineEnv copy in a process
+transitions = np.hstack([states, actions, rewards])
 
 print(f"✔ Data loaded | Samples: {len(states)} | Average reward: {rewards.mean():.3f}")
 
@@ -49,23 +133,29 @@ class OfflineEnv(gym.Env):
         self.action_space = gym.spaces.Box(
             low=-1, high=1, shape=(1,), dtype=np.float32)
 
-        # Load offline dataset
-        self._dataset = {
-            'obs': states,
-            'actions': actions,
-            'rewards': rewards,
-            'terminateds': terminals
-        }
+        # Load offline dataset (shared, not copied, across vectorized envs)
+        self._sa = transitions
+        self._term_bits = term_bits
         self._index = 0
         self._current_episode_reward = 0.0
         self._current_episode_length = 0
+        # Reused by every step() (the vector env copies its values out)
+        self._info = {'episode_reward': 0.0}
+        # Random start indices, drawn in batches from the env's own generator
+        self._reset_starts = np.empty(0, dtype=np.int64)
+        self._reset_cursor = 0
 
     def reset(self, *, seed=None, options=None):
         """Reset environment to a random starting point in the dataset."""
-        self._index = np.random.randint(0, len(self._dataset['obs']))
+        super().reset(seed=seed)
+        if seed is not None or self._reset_cursor == len(self._reset_starts):
+            self._reset_starts = self.np_random.integers(0, len(self._sa), size=1024)
+            self._reset_cursor = 0
+        self._index = int(self._reset_starts[self._reset_cursor])
+        self._reset_cursor += 1
         self._current_episode_reward = 0.0
         self._current_episode_length = 0
-        return self._dataset['obs'][self._index], {}
+        return self._sa[self._index, :34], {}
 
     def step(self, action):
         """
@@ -81,9 +171,11 @@ class OfflineEnv(gym.Env):
             truncated: Whether episode was truncated
             info: Additional info including episode reward
         """
-        obs = self._dataset['obs'][self._index]
-        reward = float(self._dataset['rewards'][self._index][0])
-        terminated = bool(self._dataset['terminateds'][self._index][0])
+        # Numpy scalars and a view into the row are returned as-is
+        row = self._sa[self._index]
+        obs = row[:34]
+        reward = row[35]
+        terminated = bool((self._term_bits[self._index >> 3] >> (self._index & 7)) & 1)
         truncated = False
 
         # Track episode statistics
@@ -91,16 +183,401 @@ class OfflineEnv(gym.Env):
         self._current_episode_length += 1
 
         # Move to next data point (cyclic)
-        self._index = (self._index + 1) % len(self._dataset['obs'])
-        return obs, reward, terminated, truncated, {
-            'episode_reward': self._current_episode_reward
-        }
+        self._index = (self._index + 1) % len(self._sa)
+        self._info['episode_reward'] = self._current_episode_reward
+        return obs, reward, terminated, truncated, self._info
+
+def build_dataset_episodes(batch_size):
+    """
+    Cut the offline dataset into replay-buffer episodes without stepping an env.
+
+    Each episode holds at most `batch_size` consecutive transitions and is
+    built from numpy views of the dataset arrays (next observations are the
+    same slice shifted by one row). Episodes end at terminal flags; others
+    are marked as truncated.
+    """
+    n = len(states)
+    is_terminal = terminal_flags(0, n)
+    ends = np.flatnonzero(is_terminal) + 1
+    bounds = np.union1d(np.r_[0, ends, n], np.arange(0, n, batch_size))
+
+    episodes = []
+    for lo, hi in zip(bounds[:-1], bounds[1:]):
+        terminated = bool(is_terminal[hi - 1])
+        # The last row has no successor; repeat it as the final observation
+        obs = states[lo:hi + 1] if hi < n else states[np.r_[lo:hi, hi - 1]]
+        episodes.append(SingleAgentEpisode(
+            observations=obs,
+            infos=[{}] * len(obs),
+            actions=actions[lo:hi],
+            rewards=rewards[lo:hi, 0],
+            terminated=terminated,
+            truncated=not terminated,
+            len_lookback_buffer=0,
+        ))
+    return episodes
 
 # =========================
-# 3. SAC Algorithm Configuration
+# 3. Prioritized Replay Buffer
 # =========================
+class _NumpySegmentTree:
+    """
+    Segment tree stored in a flat float64 array of size 2 * capacity.
+
+    The root (index 1) holds the reduction over all leaves, so full-range
+    queries are O(1), and `set_many` updates a batch of leaves by walking
+    all their parents one tree level at a time (i >>= 1). Inside
+    `deferred()`, single-leaf writes are collected and applied the same way.
+    """
+
+    _ufunc = None
+
+    def __init__(self, capacity):
+        super().__init__(capacity)
+        self.value = np.full(2 * capacity, self.neutral_element, dtype=np.float64)
+        self._pending = None
+
+    def reduce(self, start=0, end=None):
+        if start == 0 and end is None:
+            return self.value[1]
+        return super().reduce(start, end)
+
+    def __setitem__(self, idx, val):
+        if self._pending is None:
+            super().__setitem__(idx, val)
+        else:
+            self._pending[idx] = val
+
+    @contextmanager
+    def deferred(self):
+        """Collect leaf writes and apply them in one `set_many` on exit."""
+        self._pending = {}
+        try:
+            yield
+        finally:
+            pending, self._pending = self._pending, None
+            self.set_many(list(pending.keys()), list(pending.values()))
+
+    def set_many(self, idxs, vals):
+        """Overwrite several leaves (last write wins) and recompute their ancestors."""
+        nodes = np.asarray(idxs, dtype=np.int64) + self.capacity
+        if len(nodes) == 0:
+            return
+        vals = np.broadcast_to(np.asarray(vals, dtype=np.float64), nodes.shape)
+        # Keep only the last value written to each leaf
+        nodes, last = np.unique(nodes[::-1], return_index=True)
+        self.value[nodes] = vals[::-1][last]
+        nodes = np.unique(nodes >> 1)
+        while nodes[0] >= 1:
+            self.value[nodes] = self._ufunc(self.value[2 * nodes], self.value[2 * nodes + 1])
+            nodes = np.unique(nodes >> 1)
+
+    def set_state(self, state):
+        assert len(state) == self.capacity * 2
+        self.value = np.asarray(state, dtype=np.float64)
+
+
+class NumpySumSegmentTree(_NumpySegmentTree, SumSegmentTree):
+    _ufunc = np.add
+
+    def find_prefixsum_idx(self, prefixsum):
+        """Find leaf indices for one prefix sum or for an array of them."""
+        if np.ndim(prefixsum) == 0:
+            return super().find_prefixsum_idx(prefixsum)
+
+        # Descend all draws together, choosing left/right child per level
+        prefixsum = np.array(prefixsum, dtype=np.float64)
+        idx = np.ones(prefixsum.shape, dtype=np.int64)
+        for _ in range(self.capacity.bit_length() - 1):
+            left = 2 * idx
+            go_right = self.value[left] <= prefixsum
+            prefixsum -= np.where(go_right, self.value[left], 0.0)
+            idx = left + go_right
+        return idx - self.capacity
+
+
+class NumpyMinSegmentTree(_NumpySegmentTree, MinSegmentTree):
+    _ufunc = np.minimum
+
+
+def _cast_observations(episode, dtype):
+    """Cast the observations stored in an episode to `dtype` in place."""
+    buf = episode.observations
+    if isinstance(buf.data, list):
+        buf.data = [np.asarray(o, dtype=dtype) for o in buf.data]
+    else:
+        buf.data = buf.data.astype(dtype, copy=False)
+
+
+class SumTreeReplayBuffer(PrioritizedEpisodeReplayBuffer):
+    """
+    Prioritized episode replay buffer backed by numpy segment trees.
+
+    Tree indices for a whole train batch are drawn with one vectorized
+    sum-tree descent, and tree writes from `add` and `update_priorities`
+    are applied in one vectorized pass instead of one tree walk per
+    transition. Observations are stored as `obs_dtype` (e.g. float16 to
+    halve replay memory) and returned as float32; actions and rewards are
+    untouched. Episodes added with `pinned=True` are never evicted.
+    """
+
+    def __init__(self, *args, obs_dtype=np.float32, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._sum_segment = NumpySumSegmentTree(self._sum_segment.capacity)
+        self._min_segment = NumpyMinSegmentTree(self._min_segment.capacity)
+        self._obs_dtype = obs_dtype
+        # Pinned episodes are kept at the front of `self.episodes`
+        self._pinned_ids = set()
+
+    def add(self, episodes, weight=None, pinned=False):
+        """
+        Add episodes, evicting the oldest unpinned episodes beyond capacity.
+
+        Follows `PrioritizedEpisodeReplayBuffer.add`, except that eviction
+        skips pinned episodes (the offline dataset). Pinned episodes must be
+        added before any other episode, so they stay at the front of
+        `self.episodes` and evictions happen right behind them. If only
+        pinned episodes are left, the buffer may overflow until the next add.
+        """
+        if weight is None:
+            weight = self._max_priority
+        episodes = episodes if isinstance(episodes, list) else [episodes]
+        if pinned:
+            assert len(self.episodes) == len(self._pinned_ids), (
+                "Pinned episodes must be added before any other episode")
+        for episode in episodes:
+            _cast_observations(episode, self._obs_dtype)
+
+        with self._sum_segment.deferred(), self._min_segment.deferred():
+            evicted_ids = self._evict_unpinned(episodes)
+            j = len(self._indices)
+            for eps in episodes:
+                # Chunks of an episode that was just evicted are dropped with it
+                if eps.id_ in evicted_ids:
+                    continue
+                eps = copy.deepcopy(eps)
+                if eps.id_ in self.episode_id_to_index:
+                    # Continuation of a stored episode: concatenate
+                    eps_idx = self.episode_id_to_index[eps.id_]
+                    existing_eps = self.episodes[eps_idx - self._num_episodes_evicted]
+                    offset = len(existing_eps)
+                    existing_eps.concat_episode(eps)
+                else:
+                    self.episodes.append(eps)
+                    eps_idx = len(self.episodes) - 1 + self._num_episodes_evicted
+                    self.episode_id_to_index[eps.id_] = eps_idx
+                    offset = 0
+                    if pinned:
+                        self._pinned_ids.add(eps.id_)
+                self._indices.extend(
+                    (eps_idx, offset + i, self._get_free_node_and_assign(j + i, weight))
+                    for i in range(len(eps))
+                )
+                j = len(self._indices)
+
+    def _evict_unpinned(self, episodes):
+        """Count in `episodes` and evict unpinned episodes down to capacity."""
+        new_lens = {}
+        for eps in episodes:
+            new_lens[eps.id_] = new_lens.get(eps.id_, 0) + len(eps)
+            self._num_timesteps += len(eps)
+            self._num_timesteps_added += len(eps)
+
+        num_pinned = len(self._pinned_ids)
+        first_unpinned_idx = self._num_episodes_evicted + num_pinned
+        evicted_ids, evicted_idxs = set(), set()
+        while self._num_timesteps > self.capacity and len(self.episodes) > num_pinned:
+            # The oldest unpinned episode sits right behind the pinned ones
+            evicted = self.episodes[num_pinned]
+            del self.episodes[num_pinned]
+            evicted_ids.add(evicted.id_)
+            evicted_idxs.add(self.episode_id_to_index.pop(evicted.id_))
+            # Its incoming chunks (if any) are not added either
+            new_len = new_lens.pop(evicted.id_, 0)
+            self._num_timesteps -= len(evicted) + new_len
+            self._num_timesteps_added -= new_len
+            self._num_episodes_evicted += 1
+        if not evicted_idxs:
+            return evicted_ids
+
+        # Pinned episodes keep their position, so their global index moves
+        # up with `_num_episodes_evicted`; unpinned survivors keep theirs
+        shift = len(evicted_idxs)
+        for eps_id in self._pinned_ids:
+            self.episode_id_to_index[eps_id] += shift
+        new_indices = []
+        for eps_idx, ts, node in self._indices:
+            if eps_idx in evicted_idxs:
+                self._free_nodes.appendleft(node)
+                self._max_idx -= 1 if self._max_idx == node else 0
+                self._sum_segment[node] = 0.0
+                self._min_segment[node] = float("inf")
+                self._tree_idx_to_sample_idx.pop(node)
+            else:
+                if eps_idx < first_unpinned_idx:
+                    eps_idx += shift
+                self._tree_idx_to_sample_idx[node] = len(new_indices)
+                new_indices.append((eps_idx, ts, node))
+        self._indices = new_indices
+        return evicted_ids
+
+    def get_state(self):
+        return {**super().get_state(), "_pinned_ids": list(self._pinned_ids)}
+
+    def set_state(self, state):
+        super().set_state(state)
+        self._pinned_ids = set(state.get("_pinned_ids", []))
+
+    def sample(
+        self,
+        num_items=None,
+        *,
+        batch_size_B=None,
+        batch_length_T=None,
+        n_step=None,
+        beta=0.0,
+        gamma=0.99,
+        include_infos=False,
+        include_extra_model_outputs=False,
+        finalize=False,
+        **kwargs,
+    ):
+        """
+        Sample 1-step (or n-step) transitions proportionally to their priority.
+
+        Returns the same transitions and importance weights as
+        `PrioritizedEpisodeReplayBuffer.sample` in Ray 2.40 (the version
+        pinned in 2.1-environment.txt), but draws the tree indices
+        for all remaining items at once: one batch of uniforms, one
+        vectorized descent and vectorized weights. Draws too close to an
+        episode's end for the n-step are redrawn in the next round.
+        """
+        assert beta >= 0.0
+        if num_items is not None:
+            assert batch_size_B is None, (
+                "Cannot call `sample()` with both `num_items` and `batch_size_B`")
+            batch_size_B = num_items
+        batch_size_B = batch_size_B or self.batch_size_B
+        actual_n_step = n_step or 1
+        random_n_step = isinstance(n_step, tuple)
+
+        self._last_sampled_indices = []
+        sampled_episodes = []
+
+        total_segment_sum = self._sum_segment.sum()
+        num_timesteps = self.get_num_timesteps()
+        p_min = self._min_segment.min() / total_segment_sum
+        max_weight = (p_min * num_timesteps) ** (-beta)
+
+        while len(sampled_episodes) < batch_size_B:
+            remaining = batch_size_B - len(sampled_episodes)
+            idxs = self._sum_segment.find_prefixsum_idx(
+                self.rng.random(remaining) * total_segment_sum)
+            p_samples = self._sum_segment.value[idxs + self._sum_segment.capacity]
+            weights = (p_samples / total_segment_sum * num_timesteps) ** (-beta) / max_weight
+
+            for idx, weight in zip(idxs.tolist(), weights.tolist()):
+                eps_idx, episode_ts, _ = self._indices[self._tree_idx_to_sample_idx[idx]]
+                episode = self.episodes[eps_idx - self._num_episodes_evicted]
+                if random_n_step:
+                    actual_n_step = int(self.rng.integers(n_step[0], n_step[1]))
+                # Skip draws whose n-step would run past the episode's end
+                if episode_ts + actual_n_step > len(episode):
+                    continue
+
+                raw_rewards = episode.get_rewards(slice(episode_ts, episode_ts + actual_n_step))
+                rewards = scipy.signal.lfilter([1], [1, -gamma], raw_rewards[::-1], axis=0)[-1]
+                at_end = episode_ts + actual_n_step == len(episode)
+                sampled_episode = SingleAgentEpisode(
+                    observations=[
+                        np.asarray(episode.get_observations(episode_ts), dtype=np.float32),
+                        np.asarray(episode.get_observations(episode_ts + actual_n_step),
+                                   dtype=np.float32),
+                    ],
+                    observation_space=episode.observation_space,
+                    infos=(
+                        [episode.get_infos(episode_ts),
+                         episode.get_infos(episode_ts + actual_n_step)]
+                        if include_infos else None
+                    ),
+                    actions=[episode.get_actions(episode_ts)],
+                    action_space=episode.action_space,
+                    rewards=[rewards],
+                    terminated=episode.is_terminated if at_end else False,
+                    truncated=episode.is_truncated if at_end else False,
+                    extra_model_outputs={
+                        "weights": [weight],
+                        "n_step": [actual_n_step],
+                        **(
+                            {k: [episode.get_extra_model_outputs(k, episode_ts)]
+                             for k in episode.extra_model_outputs.keys()}
+                            if include_extra_model_outputs else {}
+                        ),
+                    },
+                    len_lookback_buffer=0,
+                    t_started=episode_ts,
+                )
+                if finalize:
+                    sampled_episode.finalize()
+                sampled_episodes.append(sampled_episode)
+                # Keep track of sampled indices for updating priorities later
+                self._last_sampled_indices.append(idx)
+
+        self.sampled_timesteps += batch_size_B
+        return sampled_episodes
+
+    def update_priorities(self, priorities, module_id=None):
+        """Update priorities (usually TD-errors) of the last sampled batch."""
+        assert len(priorities) == len(self._last_sampled_indices)
+        priorities = np.maximum(np.asarray(priorities, dtype=np.float64), 1e-12)
+        weights = priorities ** self._alpha
+        self._sum_segment.set_many(self._last_sampled_indices, weights)
+        self._min_segment.set_many(self._last_sampled_indices, weights)
+        self._max_priority = float(priorities.max(initial=self._max_priority))
+        self._last_sampled_indices.clear()
+
+# =========================
+# 4. SAC Algorithm Configuration
+# =========================
+class PinnedNumpyToTensor(NumpyToTensor):
+    """
+    Learner connector piece converting train batches to torch tensors.
+
+    Tensors are staged in pinned host memory and copied to the learner's
+    GPU with `non_blocking=True`, so the host-to-device copy overlaps with
+    work already queued on the device.
+    """
+
+    def __init__(self, *args, device=None, **kwargs):
+        # Convert on the CPU first; __call__ does the device copy itself
+        super().__init__(*args, device=None, **kwargs)
+        self._pin_memory = False
+        self._target_device = device
+
+    def __call__(self, **kwargs):
+        batch = super().__call__(**kwargs)
+        if self._target_device is None or not torch.cuda.is_available():
+            return batch
+        return tree.map_structure(
+            lambda t: (t.pin_memory().to(self._target_device, non_blocking=True)
+                       if torch.is_tensor(t) else t),
+            batch,
+        )
+
+
+class PinnedMemorySACConfig(SACConfig):
+    """SAC config whose learner pipeline uses `PinnedNumpyToTensor`."""
+
+    def build_learner_connector(self, input_observation_space, input_action_space, device=None):
+        pipeline = super().build_learner_connector(
+            input_observation_space, input_action_space, device=device)
+        pipeline.remove("NumpyToTensor")
+        pipeline.append(PinnedNumpyToTensor(as_learner_connector=True, device=device))
+        return pipeline
+
+
 config = (
-    SACConfig()
+    PinnedMemorySACConfig()
     .environment(env=OfflineEnv, env_config={})
     .training(
         # Policy network architecture
@@ -123,16 +600,32 @@ config = (
         gamma=0.99,
         # Training batch size
         train_batch_size=1024,
-        # Warm-up steps before learning starts
-        num_steps_sampled_before_learning_starts=5000,
-        # Experience replay buffer
+        # Warm-up steps before learning starts (the dataset prefill counts
+        # towards them, see section 5)
+        num_steps_sampled_before_learning_starts=max(0, 5000 - len(states)),
+        # Experience replay buffer: the whole dataset plus 100k env transitions
         replay_buffer_config={
             "type": "PrioritizedEpisodeReplayBuffer",
-            "capacity": 100000,
+            "capacity": len(states) + 100000,
         },
     )
-    .framework("torch")
+    # Compile the learner's RLModule (train batches keep a fixed size of 1024,
+    # so Dynamo does not recompile across shapes); "reduce-overhead" uses CUDA
+    # graphs on the GPU learner. The new-stack env runners never compile their
+    # module, so no torch_compile_worker* settings are given.
+    .framework(
+        "torch",
+        torch_compile_learner=True,
+        torch_compile_learner_dynamo_backend="inductor",
+        torch_compile_learner_dynamo_mode="reduce-overhead",
+    )
     .resources(num_gpus=1)
+    # RLlib wraps OfflineEnv in a SyncVectorEnv: each env runner advances
+    # 64 dataset cursors per sample call
+    .env_runners(
+        num_env_runners=4,
+        num_envs_per_env_runner=64,
+    )
     .offline_data(
         input_="sampler",
         actions_in_input_normalized=True,
@@ -145,16 +638,45 @@ config = (
 )
 
 # =========================
-# 4. Training Execution
+# 5. Training Execution
 # =========================
+def wait_for_save(future):
+    """Wait for a background checkpoint write; report a failure instead of raising."""
+    try:
+        future.result()
+    except Exception as e:
+        print(f"Failed to save checkpoint: {str(e)}")
+
+
 if __name__ == "__main__":
     print("▌Initializing training...")
     algo = config.build()
 
+    # SAC only accepts the built-in buffer names, so swap in the numpy-backed
+    # buffer (same settings) before any data is added
+    buffer_config = dict(config.replay_buffer_config)
+    buffer_config.pop("type")
+    # All observations come from the dataset: keep them as float16 in the
+    # buffer unless some feature exceeds the float16 range
+    fits_fp16 = np.abs(states).max() <= np.finfo(np.float16).max
+    algo.local_replay_buffer = SumTreeReplayBuffer(
+        obs_dtype=np.float16 if fits_fp16 else np.float32, **buffer_config)
+
+    # Fill the replay buffer directly from the dataset arrays; pinned episodes
+    # are never evicted by the OfflineEnv transitions the env runners add
+    dataset_episodes = build_dataset_episodes(config.train_batch_size)
+    algo.local_replay_buffer.add(dataset_episodes, pinned=True)
+
     # Create checkpoint directory
     checkpoint_dir = "/root/ray/checkpoints_final"
     os.makedirs(checkpoint_dir, exist_ok=True)
 
+    # Best-model checkpoints are written to disk by a background thread so the
+    # next algo.train() call does not wait on serialization and disk I/O; the
+    # state itself is always taken on the main thread, between train() calls
+    saver = ThreadPoolExecutor(max_workers=1)
+    pending_save = None
+
     try:
         best_reward = -float('inf')
         
@@ -173,8 +695,16 @@ if __name__ == "__main__":
             # Save best model
             if avg_reward > best_reward:
                 best_reward = avg_reward
-                checkpoint_path = algo.save(checkpoint_dir)
-                print(f"↯ Saved best checkpoint (reward={avg_reward:.2f})")
+                # At most one save in flight: finish the previous one first
+                if pending_save is not None:
+                    wait_for_save(pending_save)
+                # get_state() returns numpy views of live CPU parameters, which the
+                # next train() overwrites in place; copy them before handing off
+                state = tree.map_structure(
+                    lambda x: x.copy() if isinstance(x, np.ndarray) else x,
+                    algo.get_state())
+                pending_save = saver.submit(algo.save_to_path, checkpoint_dir, state=state)
+                print(f"↯ Saving best checkpoint (reward={avg_reward:.2f})")
 
             # Early stopping if no improvement
             if i > 20 and avg_reward <= 0:
@@ -184,22 +714,23 @@ if __name__ == "__main__":
     except KeyboardInterrupt:
         print("Training interrupted by user")
     finally:
-        # Save final checkpoint
+        # Wait for any background save, then save final checkpoint
+        if pending_save is not None:
+            wait_for_save(pending_save)
+        saver.shutdown()
         checkpoint_path = algo.save(checkpoint_dir)
         print(f"✔ Final checkpoint saved to: {checkpoint_path}")
 
         # Export PyTorch model for deployment
         try:
-            from ray.rllib.algorithms.algorithm import Algorithm
-
-            if isinstance(algo, Algorithm):
-                policy = algo.get_policy()
-                if policy is not None:
-                    torch.save(
-                        policy.model.state_dict(),
-                        os.path.join(checkpoint_dir, "torch_model.pt")
-                    )
-                    print(f"✔ PyTorch model saved to: {checkpoint_dir}/torch_model.pt")
+            # The new API stack has no policies; export the SAC RLModule instead
+            module = algo.get_module()
+            if module is not None:
+                torch.save(
+                    module.state_dict(),
+                    os.path.join(checkpoint_dir, "torch_model.pt")
+                )
+                print(f"✔ PyTorch model saved to: {checkpoint_dir}/torch_model.pt")
         except Exception as e:
             print(f"Failed to save PyTorch model: {str(e)}")
 
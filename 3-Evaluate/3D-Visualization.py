@@ -9,10 +9,12 @@ standard deviation regions.
 
 import numpy as np
 import matplotlib.pyplot as plt
-import matplotlib.font_manager as fm
+from matplotlib.collections import LineCollection
+from matplotlib.layout_engine import TightLayoutEngine
+from matplotlib.lines import Line2D
 import pandas as pd
 import os
-from scipy.interpolate import make_interp_spline
+from scipy.interpolate import CubicSpline
 
 # =========================
 # 1. Load and Validate Data
@@ -30,41 +32,8 @@ print(f"✔ Data loaded successfully | Shape: {df.shape}")
 # =========================
 # 2. Configure Nature Style
 # =========================
-# Check available fonts (prioritizing Nature-recommended fonts)
-available_fonts = [f.name for f in fm.fontManager.ttflist]
-font_options = [
-    'Arial', 'Helvetica', 'Liberation Sans', 'Nimbus Sans',
-    'DejaVu Sans', 'FreeSans', 'Bitstream Vera Sans'
-]
-selected_font = next((f for f in font_options if f in available_fonts), 'sans-serif')
-
-# Apply Nature journal style parameters
-plt.rcParams.update({
-    'font.family': 'sans-serif',
-    'font.sans-serif': [selected_font],
-    'font.size': 9,
-    'axes.linewidth': 0.8,
-    'lines.linewidth': 1.2,
-    'xtick.major.width': 0.8,
-    'ytick.major.width': 0.8,
-    'xtick.major.size': 3,
-    'ytick.major.size': 3,
-    'xtick.direction': 'in',
-    'ytick.direction': 'in',
-    'xtick.labelsize': 9,
-    'ytick.labelsize': 9,
-    'axes.labelsize': 10,
-    'axes.labelweight': 'normal',
-    'legend.fontsize': 9,
-    'figure.dpi': 1200,
-    'savefig.dpi': 1200,
-    'axes.facecolor': 'white',
-    'axes.edgecolor': 'black',
-    'axes.grid': False,
-    'grid.alpha': 0,
-    'pdf.fonttype': 42,
-    'svg.fonttype': 'none',
-})
+# Apply Nature journal style parameters (shared style file next to this script)
+plt.style.use(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'nature.mplstyle'))
 
 # =========================
 # 3. Data Preparation
@@ -76,25 +45,25 @@ y0_std = df['0_std'].values
 y1_mean = df['1_mean'].values
 y1_std = df['1_std'].values
 
-# Sort data for proper smoothing
-sort_idx = np.argsort(x)
-x_sorted = x[sort_idx]
-y0_sorted = y0_mean[sort_idx]
-y1_sorted = y1_mean[sort_idx]
-y0_std_sorted = y0_std[sort_idx]
-y1_std_sorted = y1_std[sort_idx]
-
-# Create smooth curves using B-spline interpolation
+# Sort data for proper smoothing (skipped when x is already ascending)
+y_stacked = np.column_stack([y0_mean, y0_std, y1_mean, y1_std])
+if np.all(np.diff(x) >= 0):
+    x_sorted, y_stacked_sorted = x, y_stacked
+else:
+    sort_idx = np.argsort(x, kind='stable')
+    x_sorted, y_stacked_sorted = x[sort_idx], y_stacked[sort_idx]
+y0_sorted, y0_std_sorted, y1_sorted, y1_std_sorted = y_stacked_sorted.T
+
+# Create smooth curves using cubic spline interpolation (both groups in one
+# spline: column 0 is group 0, column 1 is group 1)
 x_smooth = np.linspace(x_sorted.min(), x_sorted.max(), 300)
-spl0 = make_interp_spline(x_sorted, y0_sorted, k=3)
-y0_smooth = spl0(x_smooth)
-spl1 = make_interp_spline(x_sorted, y1_sorted, k=3)
-y1_smooth = spl1(x_smooth)
+spl = CubicSpline(x_sorted, np.column_stack([y0_sorted, y1_sorted]), axis=0)
+y0_smooth, y1_smooth = spl(x_smooth).T
 
 # =========================
 # 4. Plot Configuration
 # =========================
-fig, ax = plt.subplots(figsize=(7, 5), dpi=1200)
+fig, ax = plt.subplots(figsize=(7, 5))
 
 # Nature-style color scheme
 color_0 = '#2166AC'  # Blue
@@ -102,20 +71,22 @@ color_1 = '#B2182B'  # Red
 std_alpha = 0.15     # Transparency for standard deviation regions
 
 # Plot standard deviation regions
+# (regions and data points are rasterized in PDF/SVG output; curves, axes
+# and text stay vector)
 ax.fill_between(x_sorted, y0_sorted - y0_std_sorted, y0_sorted + y0_std_sorted,
-                alpha=std_alpha, color=color_0, linewidth=0)
+                alpha=std_alpha, color=color_0, linewidth=0, rasterized=True)
 ax.fill_between(x_sorted, y1_sorted - y1_std_sorted, y1_sorted + y1_std_sorted,
-                alpha=std_alpha, color=color_1, linewidth=0)
+                alpha=std_alpha, color=color_1, linewidth=0, rasterized=True)
 
-# Plot original data points
-ax.scatter(x, y0_mean, s=8, color=color_0, alpha=0.4, edgecolors='none')
-ax.scatter(x, y1_mean, s=8, color=color_1, alpha=0.4, edgecolors='none')
+# Plot original data points (both groups in one artist)
+ax.scatter(np.r_[x, x], np.r_[y0_mean, y1_mean], s=8,
+           c=[color_0] * len(x) + [color_1] * len(x), alpha=0.4,
+           edgecolors='none', rasterized=True)
 
-# Plot smoothed curves
-line0, = ax.plot(x_smooth, y0_smooth, color=color_0, linewidth=1.8,
-                 label='Group 0 (Mean ± STD)')
-line1, = ax.plot(x_smooth, y1_smooth, color=color_1, linewidth=1.8,
-                 label='Group 1 (Mean ± STD)')
+# Plot smoothed curves (both groups in one artist, drawn above the points)
+ax.add_collection(LineCollection(
+    [np.column_stack([x_smooth, y0_smooth]), np.column_stack([x_smooth, y1_smooth])],
+    colors=[color_0, color_1], linewidths=1.8, zorder=2))
 
 # =========================
 # 5. Plot Customization
@@ -138,8 +109,8 @@ ax.set_ylim(min(y0_mean.min(), y1_mean.min()) - y_margin,
 # Legend configuration
 from matplotlib.patches import Rectangle
 legend_elements = [
-    line0,
-    line1,
+    Line2D([], [], color=color_0, linewidth=1.8),
+    Line2D([], [], color=color_1, linewidth=1.8),
     Rectangle((0, 0), 1, 1, facecolor=color_0, alpha=std_alpha, edgecolor='none'),
     Rectangle((0, 0), 1, 1, facecolor=color_1, alpha=std_alpha, edgecolor='none')
 ]
@@ -163,7 +134,9 @@ ax.grid(True, alpha=0.2, linewidth=0.5, linestyle='-')
 ax.set_title('Comparison of Two Groups with Standard Deviation',
              fontsize=11, pad=12, weight='normal')
 
-plt.tight_layout(pad=2.0)
+# Apply tight layout once without attaching a layout engine, so savefig does
+# not re-run a layout pass for every output format
+TightLayoutEngine(pad=2.0).execute(fig)
 
 # =========================
 # 6. Save High-Quality Output
@@ -171,9 +144,17 @@ plt.tight_layout(pad=2.0)
 output_base = 'bis01_comparison_nature_style'
 formats = ['svg', 'png', 'pdf']
 
+# Compute the tight bounding box once, at the output dpi, and reuse it for
+# every format; draw_without_rendering works on any backend
+screen_dpi = fig.dpi
+fig.set_dpi(600)
+fig.draw_without_rendering()
+tight_bbox = fig.get_tightbbox().padded(plt.rcParams['savefig.pad_inches'])
+fig.set_dpi(screen_dpi)
+
 for fmt in formats:
     plt.savefig(f'{output_base}.{fmt}', format=fmt, dpi=600,
-                bbox_inches='tight', facecolor='white', edgecolor='none')
+                bbox_inches=tight_bbox, facecolor='white', edgecolor='none')
     print(f"✔ Saved {fmt.upper()} format: {output_base}.{fmt}")
 
 plt.show()